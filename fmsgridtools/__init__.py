@@ -6,5 +6,6 @@ from .make_topog import make_topog
 from .re_map import re_map
 from .shared.gridtools_utils import check_file_is_there, get_provenance_attrs
 from .shared.gridobj import GridObj
+from .shared.gridmosaicobj import GridMosaicObj
 from .shared.mosaicobj import MosaicObj
 from .shared.xgridobj import XGridObj
@@ -5,7 +5,7 @@ from numpy.typing import NDArray
 import xarray as xr
 
 from fmsgridtools.shared.gridtools_utils import get_provenance_attrs
-from fmsgridtools.shared.gridobj import GridObj
+from fmsgridtools.shared.gridobj import GridObj, GRID_VAR_DIMS
 
 def fill_cubic_grid_halo(
         nx: int, 
@@ -480,59 +480,15 @@ class HGridObj():
             dataset.to_netcdf(outfile)
 
     def make_gridobj(self) -> "GridObj":
-        var_dict = {}
         if self.dataset is None:
-            tile = xr.DataArray(
-                [self.tile]
-            )
-            var_dict['tile'] = tile
-            if self.x is not None:
-                x = xr.DataArray(
-                    data=self.x,
-                    dims=["nyp", "nxp"],
-                )
-                var_dict['x'] = x
-            if self.y is not None:
-                y = xr.DataArray(
-                    data=self.y,
-                    dims=["nyp", "nxp"],
-                )
-                var_dict['y'] = y
-            if self.dx is not None:
-                dx = xr.DataArray(
-                    data=self.dx,
-                    dims=["nyp", "nx"],
-                )
-                var_dict['dx'] = dx
-            if self.dy is not None:
-                dy = xr.DataArray(
-                    data=self.dy,
-                    dims=["ny", "nxp"],
-                )
-                var_dict['dy'] = dy
-            if self.angle_dx is not None:
-                angle_dx = xr.DataArray(
-                    data=self.angle_dx,
-                    dims=["nyp", "nxp"],
-                )
-                var_dict['angle_dx'] = angle_dx
-            if self.angle_dy is not None:
-                angle_dy = xr.DataArray(
-                    data=self.angle_dy,
-                    dims=["nyp", "nxp"],
-                )
-                var_dict['angle_dy'] = angle_dy
-            if self.area is not None:
-                area = xr.DataArray(
-                    data=self.area,
-                    dims=["ny", "nx"],
-                )
-                var_dict['area'] = area
+            var_dict = {'tile': xr.DataArray([self.tile])}
+            var_dict.update({
+                name: xr.DataArray(data=getattr(self, name), dims=dims)
+                for name, dims in GRID_VAR_DIMS.items()
+                if getattr(self, name) is not None
+            })
             if self.arcx is not None:
-                arcx = xr.DataArray(
-                    [self.arcx],
-                )
-                var_dict['arcx'] = arcx
+                var_dict['arcx'] = xr.DataArray([self.arcx])
             dataset = xr.Dataset(
                 data_vars = var_dict
             )
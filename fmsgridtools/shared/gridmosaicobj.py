@@ -0,0 +1,105 @@
+import numpy as np
+
+from fmsgridtools.shared.gridobj import GridObj, GRID_VAR_DIMS
+
+
+"""
+GridMosaicObj:
+
+Class for containing the grid data of all tiles in a mosaic. Each grid
+variable is stored as a single contiguous array with the tile as the
+leading dimension, e.g. x has shape (ntiles, nyp, nxp), so an operation
+on a field can be applied to all tiles at once. All tiles must have the
+same shape, as is the case for cubed-sphere grids.
+"""
+class GridMosaicObj:
+
+    def __init__(self, gridfiles: list[str] = None):
+        self.gridfiles = gridfiles
+        self.ntiles = None
+        self.tiles = None
+        self.arcx = None
+        self.nx = None
+        self.ny = None
+        self.nxp = None
+        self.nyp = None
+        self.x = None
+        self.y = None
+        self.dx = None
+        self.dy = None
+        self.area = None
+        self.angle_dx = None
+        self.angle_dy = None
+
+
+    """
+    read:
+    This function reads in the gridfiles and stacks each grid variable
+    over the tiles
+    """
+    def read(self, toradians: bool = False):
+
+        if not self.gridfiles:
+            raise IOError("Please specify gridfiles")
+
+        grids = [GridObj(gridfile=gridfile).read() for gridfile in self.gridfiles]
+
+        self.ntiles = len(grids)
+        self.tiles = [grid.tile for grid in grids]
+        self.arcx = [grid.arcx for grid in grids]
+        for key in ("nx", "ny", "nxp", "nyp"):
+            setattr(self, key, getattr(grids[0], key))
+
+        for name in GRID_VAR_DIMS:
+            if not all(name in grid.dataset.data_vars for grid in grids):
+                continue
+            field = None
+            for itile, grid in enumerate(grids):
+                value = getattr(grid, name)
+                if field is None:
+                    field = np.empty((self.ntiles,) + value.shape, dtype=value.dtype)
+                elif value.shape != field.shape[1:]:
+                    raise ValueError(
+                        f"{name} in {self.gridfiles[itile]} has shape {value.shape},"
+                        f" expected {field.shape[1:]}; all tiles must have the same shape"
+                    )
+                field[itile] = value
+                # release the per-tile copy once it is stacked
+                setattr(grid, name, None)
+            setattr(self, name, field)
+
+        if toradians:
+            self.x = np.radians(self.x, out=self.x)
+            self.y = np.radians(self.y, out=self.y)
+
+        return self
+
+
+    """
+    get_tile:
+    This method returns a GridObj for tile number itile (starting from 0)
+    whose arrays are views into the stacked arrays, no data is copied
+    """
+    def get_tile(self, itile: int) -> GridObj:
+
+        arrays = {
+            name: getattr(self, name)[itile]
+            for name in GRID_VAR_DIMS if getattr(self, name) is not None
+        }
+
+        return GridObj.from_arrays(tile=self.tiles[itile], arcx=self.arcx[itile], **arrays)
+
+
+    """
+    write:
+    This method writes out the grid of each tile to gridfiles, or to the
+    gridfiles that were read in if none are given. Only the grid variables,
+    tile and arcx are written; global attributes and any other variables in
+    the files that were read in are not kept.
+    """
+    def write(self, gridfiles: list[str] = None):
+
+        if gridfiles is None:
+            gridfiles = self.gridfiles
+
+        GridObj.write_mosaic([self.get_tile(itile) for itile in range(self.ntiles)], gridfiles)
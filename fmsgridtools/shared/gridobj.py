@@ -1,45 +1,324 @@
 import dataclasses
+import os
+import weakref
 from typing import List, Optional
+import h5py
+import netCDF4
 import numpy as np
 import numpy.typing as npt
 import xarray as xr
 from fmsgridtools.shared.gridtools_utils import check_file_is_there
 
 
+# dimensions of the numeric grid variables
+GRID_VAR_DIMS = {
+    "x": ["nyp", "nxp"],
+    "y": ["nyp", "nxp"],
+    "dx": ["nyp", "nx"],
+    "dy": ["ny", "nxp"],
+    "area": ["ny", "nx"],
+    "angle_dx": ["nyp", "nxp"],
+    "angle_dy": ["nyp", "nxp"],
+}
+# grid variables read in as numeric arrays
+_VAR_NAMES = tuple(GRID_VAR_DIMS)
+# grid variables read in as scalar strings
+_STR_NAMES = ("tile", "arcx")
+# grid sizes read in from the dimensions
+_SIZE_NAMES = ("nx", "ny", "nxp", "nyp")
+# each grid size and the size it is derived from, nxp = nx + 1 and nyp = ny + 1
+_SIZE_OFFSETS = {"nx": ("nxp", -1), "ny": ("nyp", -1), "nxp": ("nx", 1), "nyp": ("ny", 1)}
+# grid variables that are converted to a smaller dtype when one is requested
+# through GridObj(dtype=...); area, angle_dx and angle_dy always keep the
+# precision of the file. Grids passed to the exchange grid routines in
+# pyfrenctools must keep the default float64.
+_REDUCIBLE_NAMES = ("x", "y", "dx", "dy")
+# byte alignment of the arrays returned by GridObj.xy_packed
+_ALIGNMENT = 64
+# upper bound on chunk lengths when writing, 1024x1024 float64 is 8 MB
+_MAX_CHUNK = 1024
+# datasets shared by GridObj instances reading the same, unmodified grid file;
+# shared datasets must not be modified in place or closed by a single GridObj
+_DATASET_CACHE = weakref.WeakValueDictionary()
+
+
+def _ascont(a: npt.NDArray) -> npt.NDArray:
+    # np.ascontiguousarray that passes None through, since grid variables
+    # may be missing; it does not copy arrays that are already C-contiguous
+    if a is None:
+        return None
+    return np.ascontiguousarray(a)
+
+
+def _open_grid_dataset(gridfile: str) -> xr.Dataset:
+    # the modification time is part of the key so a rewritten file is reopened
+    path = os.path.abspath(gridfile)
+    key = (path, os.stat(path).st_mtime_ns)
+    dataset = _DATASET_CACHE.get(key)
+    if dataset is not None:
+        return dataset
+
+    # h5netcdf opens netCDF4 files faster, fall back to the default engine
+    # when it is not installed or the file is netCDF3 (not HDF5 based)
+    try:
+        dataset = xr.open_dataset(path, engine="h5netcdf")
+    except (ImportError, OSError, ValueError):
+        dataset = xr.open_dataset(path)
+
+    _DATASET_CACHE[key] = dataset
+    return dataset
+
+
+def _aligned_zeros(shape: tuple[int, ...], dtype: npt.DTypeLike) -> npt.NDArray:
+    # np.zeros only guarantees the alignment of the dtype, so over-allocate
+    # and start the array at the first _ALIGNMENT byte boundary
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buffer = np.zeros(nbytes + _ALIGNMENT, dtype=np.uint8)
+    offset = -buffer.ctypes.data % _ALIGNMENT
+    return buffer[offset:offset+nbytes].view(dtype).reshape(shape)
+
+
+def _auto_chunk(shape: tuple[int, ...]) -> tuple[int, ...]:
+    return tuple(min(n, _MAX_CHUNK) for n in shape)
+
+
+def _write_grid_dataset(dataset: xr.Dataset, filepath: str):
+    # write with h5netcdf, falling back to the default engine when h5netcdf
+    # is not installed
+    try:
+        dataset.to_netcdf(filepath, engine="h5netcdf")
+    except (ImportError, ValueError):
+        dataset.to_netcdf(filepath)
+
+
+def _write_grid_arrays(grid: "GridObj", filepath: str):
+    # write the grid variables with netCDF4-python directly, skipping the
+    # xarray Dataset for grids that are not backed by one. The file layout
+    # matches _build_dataset: only the dimensions in use are created and
+    # tile/arcx are 1-element strings along dim_0.
+    arrays = {
+        name: getattr(grid, name)
+        for name in GRID_VAR_DIMS if getattr(grid, name) is not None
+    }
+    strings = {
+        name: getattr(grid, name)
+        for name in _STR_NAMES if getattr(grid, name) is not None
+    }
+    sizes = {}
+    for name, value in arrays.items():
+        sizes.update(zip(GRID_VAR_DIMS[name], value.shape))
+
+    with netCDF4.Dataset(filepath, "w", format="NETCDF4") as ncfile:
+        for dim, size in sizes.items():
+            ncfile.createDimension(dim, size)
+        for name, value in arrays.items():
+            var = ncfile.createVariable(name, value.dtype, GRID_VAR_DIMS[name],
+                                        zlib=True, complevel=1,
+                                        chunksizes=_auto_chunk(value.shape))
+            var[:] = value
+        if strings:
+            ncfile.createDimension("dim_0", 1)
+        for name, value in strings.items():
+            ncfile.createVariable(name, str, ("dim_0",))[0] = value
+
+
+def _decode_scalar(da: xr.DataArray) -> str:
+    value = da.values
+    if value.dtype.kind == "S":
+        return value.item().decode("ascii")
+    return str(value.item())
+
+
+def _agrid_lonlat(x: npt.NDArray, y: npt.NDArray) -> tuple[npt.NDArray, npt.NDArray]:
+    # A-grid centers are the odd supergrid points along the second row (lon)
+    # and second column (lat); the strided multiply writes straight into a
+    # new contiguous array
+    D2R = np.pi/180
+    nx = (x.shape[1]-1)//2
+    ny = (x.shape[0]-1)//2
+
+    a_lon = np.multiply(x[1, 1:2*nx:2], D2R)
+    a_lat = np.multiply(y[1:2*ny:2, 1], D2R)
+
+    return a_lon, a_lat
+
+
+def _mmap_variable(h5file: h5py.File, name: str) -> npt.NDArray:
+    # memory-map a variable that is stored contiguous and uncompressed in an
+    # HDF5 based (netCDF4) file, returns None when it cannot be mapped or
+    # when its values would need CF decoding. Variables written by
+    # GridObj.write are chunked and compressed and are never mapped.
+    if name not in h5file:
+        return None
+    var = h5file[name]
+    offset = var.id.get_offset()
+    if offset is None or var.chunks is not None or var.dtype.kind != "f":
+        return None
+    if "scale_factor" in var.attrs or "add_offset" in var.attrs:
+        return None
+    for key in ("_FillValue", "missing_value"):
+        if key in var.attrs and not np.isnan(var.attrs[key]).all():
+            return None
+
+    return np.memmap(h5file.filename, dtype=var.dtype, mode="r",
+                     offset=offset, shape=var.shape)
+
+
+def _lazy_var(name: str, decode: bool = False) -> property:
+    # the variable is only read from the dataset on first access and is
+    # then cached on the instance under _<name>
+    attr = f"_{name}"
+
+    def getter(self):
+        if getattr(self, attr) is None and self.dataset is not None:
+            if name in self.dataset.data_vars:
+                if decode:
+                    value = _decode_scalar(self.dataset[name])
+                else:
+                    value = None
+                    h5file = self._get_h5file() if self.mmap else None
+                    if h5file:
+                        value = _mmap_variable(h5file, name)
+                    if value is None:
+                        # a read-only view, the array is shared with every
+                        # GridObj holding the same dataset
+                        value = _ascont(self.dataset[name].values).view()
+                        value.setflags(write=False)
+                    if name in _REDUCIBLE_NAMES and self.dtype.itemsize < value.dtype.itemsize:
+                        value = value.astype(self.dtype)
+                setattr(self, attr, value)
+        return getattr(self, attr)
+
+    def setter(self, value):
+        setattr(self, attr, value)
+
+    return property(getter, setter)
+
+
 """
 GridObj:
 
-Class for containing basic grid data to be used by other grid objects
+Class for containing basic grid data to be used by other grid objects.
+
+GridObjs that read the same, unmodified gridfile share a single dataset,
+and the grid variables read from a dataset are read-only views of it.
+Assign new arrays to the grid variables (e.g. grid.x = grid.x * 2, or
+grid.x = grid.x.copy() before modifying in place) instead. Closing the
+dataset affects every GridObj reading that file.
 """
 class GridObj:
 
-    def __init__(self, dataset: type[xr.Dataset] = None, gridfile: str = None):
+    __slots__ = ("gridfile", "dtype", "mmap", "_h5file", "dataset") + _SIZE_NAMES + tuple(
+        f"_{name}" for name in _VAR_NAMES + _STR_NAMES
+    )
+
+    x = _lazy_var("x")
+    y = _lazy_var("y")
+    dx = _lazy_var("dx")
+    dy = _lazy_var("dy")
+    area = _lazy_var("area")
+    angle_dx = _lazy_var("angle_dx")
+    angle_dy = _lazy_var("angle_dy")
+    tile = _lazy_var("tile", decode=True)
+    arcx = _lazy_var("arcx", decode=True)
+
+    def __init__(self,
+                 dataset: type[xr.Dataset] = None,
+                 gridfile: str = None,
+                 dtype: npt.DTypeLike = None,
+                 mmap: bool = False):
         self.gridfile = gridfile
-        self.tile = None
+        self.dtype = np.dtype(np.float64 if dtype is None else dtype)
+        self.mmap = mmap
+        self._h5file = None
         self.nx = None
         self.ny = None
         self.nxp = None
         self.nyp = None
-        self.tile = None
-        self.x = None
-        self.y = None
-        self.dx = None
-        self.dy = None
-        self.area = None
-        self.angle_dx = None
-        self.angle_dy = None
-        self.arcx = None
+        self._tile = None
+        self._x = None
+        self._y = None
+        self._dx = None
+        self._dy = None
+        self._area = None
+        self._angle_dx = None
+        self._angle_dy = None
+        self._arcx = None
         self.dataset = dataset
 
+        if self.dataset is not None:
+            self.get_attributes()
+
+
+    """
+    from_arrays:
+    This method returns a GridObj holding the given arrays directly, without
+    building an xarray dataset. The grid sizes are taken from the array
+    shapes, which must agree with each other.
+    """
+    @classmethod
+    def from_arrays(cls,
+                    *,
+                    x: npt.NDArray = None,
+                    y: npt.NDArray = None,
+                    dx: npt.NDArray = None,
+                    dy: npt.NDArray = None,
+                    area: npt.NDArray = None,
+                    angle_dx: npt.NDArray = None,
+                    angle_dy: npt.NDArray = None,
+                    tile: str = None,
+                    arcx: str = None) -> "GridObj":
+
+        grid = cls()
+        arrays = dict(x=x, y=y, dx=dx, dy=dy, area=area,
+                      angle_dx=angle_dx, angle_dy=angle_dy)
+        for name, value in arrays.items():
+            if value is None:
+                continue
+            dims = GRID_VAR_DIMS[name]
+            if value.ndim != len(dims):
+                raise ValueError(f"{name} must be {len(dims)}D, got shape {value.shape}")
+            for dim, size in zip(dims, value.shape):
+                expected = grid._size_from_set(dim)
+                if expected is not None and size != expected:
+                    raise ValueError(
+                        f"{name} has shape {value.shape} with {dim}={size},"
+                        f" expected {dim}={expected} from the arrays before it"
+                    )
+                setattr(grid, dim, size)
+            setattr(grid, name, _ascont(value))
+        grid.tile = tile
+        grid.arcx = arcx
+
+        for dim in _SIZE_NAMES:
+            if getattr(grid, dim) is None:
+                setattr(grid, dim, grid._size_from_set(dim))
+
+        return grid
+
+    def _size_from_set(self, dim: str) -> int:
+
+        # the size of dim if it is set, or derived from its counterpart
+        # (nx from nxp, nxp from nx, ...), None if neither is set
+        if getattr(self, dim) is not None:
+            return getattr(self, dim)
+        other, offset = _SIZE_OFFSETS[dim]
+        if getattr(self, other) is not None:
+            return getattr(self, other) + offset
+        return None
 
     """
     read:
-    This function reads in the gridfile and initializes the instance variables
+    This function reads in the gridfile, unless a dataset was already given,
+    and initializes the instance variables. Any grid variables set since the
+    last read are dropped, so each call starts again from the dataset.
     """
     def read(self, toradians: bool = False):
 
-        check_file_is_there(self.gridfile)
-        self.dataset = xr.open_dataset(self.gridfile)
+        if self.dataset is None:
+            check_file_is_there(self.gridfile)
+            self.dataset = _open_grid_dataset(self.gridfile)
         self.get_attributes()
 
         if toradians:
@@ -48,26 +327,112 @@ class GridObj:
 
         return self
 
+    """
+    read_header:
+    This function reads only the dimension sizes from the gridfile header,
+    without going through xarray, for callers that only need nx, ny, nxp
+    and nyp. The dataset attribute is left as is.
+    """
+    def read_header(self):
+
+        check_file_is_there(self.gridfile)
+        with netCDF4.Dataset(self.gridfile, "r") as ncfile:
+            for key in _SIZE_NAMES:
+                if key in ncfile.dimensions:
+                    setattr(self, key, ncfile.dimensions[key].size)
+
+        return self
+
     def get_attributes(self):
 
-        for key in self.dataset.data_vars:
-            if isinstance(self.dataset.data_vars[key].values, np.ndarray):
-                setattr(self, key, self.dataset.data_vars[key].values)
-            else:
-                setattr(self, key, self.dataset.data_vars[key].astype(str).values)
+        # variables are read lazily, drop any cached from a previous dataset
+        for key in _VAR_NAMES + _STR_NAMES:
+            setattr(self, f"_{key}", None)
 
-        for key in self.dataset.sizes:
-            setattr(self, key, self.dataset.sizes[key])
+        for key in _SIZE_NAMES:
+            if key in self.dataset.sizes:
+                setattr(self, key, self.dataset.sizes[key])
 
     """
     write_out_grid:
     This method will generate a netcdf file containing the contents of the
-    dataset attribute.
+    dataset attribute, or of the grid variables if there is no dataset.
     """
     def write(self, filepath: str):
 
+        if self.dataset is None:
+            # nothing is written when no grid variable is set, e.g. after
+            # read_header
+            if any(getattr(self, name) is not None for name in _VAR_NAMES):
+                _write_grid_arrays(self, filepath)
+            return
+
+        _write_grid_dataset(self._build_dataset(), filepath)
+
+
+    """
+    write_mosaic:
+    This method writes out the grids of all tiles in a mosaic, one file
+    per grid, through a single xr.save_mfdataset call. grids and filepaths
+    must have the same length.
+    """
+    @classmethod
+    def write_mosaic(cls, grids: List["GridObj"], filepaths: List[str]):
+
+        if len(grids) != len(filepaths):
+            raise ValueError(
+                f"write_mosaic got {len(grids)} grids but {len(filepaths)} filepaths"
+            )
+
+        # grids without any variables are skipped, as in write
+        datasets = []
+        paths = []
+        for grid, filepath in zip(grids, filepaths):
+            dataset = grid._build_dataset()
+            if dataset is not None:
+                datasets.append(dataset)
+                paths.append(filepath)
+        if not datasets:
+            return
+
+        try:
+            xr.save_mfdataset(datasets, paths, engine="h5netcdf")
+        except (ImportError, ValueError):
+            xr.save_mfdataset(datasets, paths)
+
+
+    """
+    _build_dataset:
+    This method returns the dataset to be written out, with the 2D fields
+    compressed and chunked. The grid variables are assembled into a new
+    dataset if there is no dataset attribute.
+    """
+    def _build_dataset(self) -> xr.Dataset:
+
         if self.dataset is not None:
-            self.dataset.to_netcdf(filepath)
+            dataset = self.dataset.copy(deep=False)
+        else:
+            data_vars = {
+                name: xr.DataArray(data=getattr(self, name), dims=dims)
+                for name, dims in GRID_VAR_DIMS.items()
+                if getattr(self, name) is not None
+            }
+            if not data_vars:
+                return None
+            for name in _STR_NAMES:
+                if getattr(self, name) is not None:
+                    data_vars[name] = xr.DataArray([getattr(self, name)])
+            dataset = xr.Dataset(data_vars=data_vars)
+
+        for var in dataset.data_vars.values():
+            if var.ndim == 2:
+                # keep the source encoding (dtype, _FillValue, scale_factor, ...)
+                var.encoding.update(
+                    zlib=True, complevel=1, contiguous=False,
+                    chunksizes=_auto_chunk(var.shape)
+                )
+
+        return dataset
 
 
     """
@@ -79,54 +444,63 @@ class GridObj:
         return list(self.dataset.data_vars.keys())
 
     def x_contiguous(self):
-
-        if self.x is not None:
-            return np.ascontiguousarray(self.x)
-        else:
-            return None
+        return self._contiguous("x")
 
     def y_contiguous(self):
-
-        if self.y is not None:
-            return np.ascontiguousarray(self.y)
-        else:
-            return None
+        return self._contiguous("y")
 
     def dx_contiguous(self):
-
-        if self.dx is not None:
-            return np.ascontiguousarray(self.dx)
-        else:
-            return None
+        return self._contiguous("dx")
 
     def dy_contiguous(self):
-
-        if self.dy is not None:
-            return np.ascontiguousarray(self.dataset.dy)
-        else:
-            return None
+        return self._contiguous("dy")
 
     def area_contiguous(self):
-
-        if self.area is not None:
-            return np.ascontiguousarray(self.dataset.area)
-        else:
-            return None
+        return self._contiguous("area")
 
     def angle_dx_contiguous(self):
-
-        if self.angle_dx is not None:
-            return np.ascontiguousarray(self.dataset.angle_dx)
-        else:
-            return None
+        return self._contiguous("angle_dx")
 
     def angle_dy_contiguous(self):
+        return self._contiguous("angle_dy")
 
-        if self.angle_dy is not None:
-            return np.ascontiguousarray(self.dataset.angle_dy)
-        else:
+    def _contiguous(self, name: str):
+
+        return _ascont(getattr(self, name))
+
+    def _get_h5file(self):
+
+        # the gridfile is opened with h5py once per GridObj, False marks a
+        # gridfile that is not HDF5 based (e.g. netCDF3) and cannot be mapped
+        if self._h5file is None:
+            try:
+                self._h5file = h5py.File(self.gridfile, "r")
+            except (OSError, TypeError):
+                self._h5file = False
+        return self._h5file
+
+
+    """
+    xy_packed:
+    This method returns x and y interleaved in the fastest varying dimension
+    as an array of shape (nyp, nxp_pad, 2), where nxp is zero-padded up to a
+    multiple of simd_width. The array starts on a 64-byte boundary, so with
+    float64 and the default simd_width of 8 every row does too.
+    """
+    def xy_packed(self, simd_width: int = 8) -> npt.NDArray:
+
+        if self.x is None or self.y is None:
             return None
 
+        nyp, nxp = self.x.shape
+        nxp_pad = -(-nxp // simd_width) * simd_width
+
+        packed = _aligned_zeros((nyp, nxp_pad, 2), np.result_type(self.x, self.y))
+        packed[:, :nxp, 0] = self.x
+        packed[:, :nxp, 1] = self.y
+
+        return packed
+
 
     """
     get_agrid_lonlat:
@@ -135,23 +509,10 @@ class GridObj:
     x and y attributes of the GridObj.
     """
     def get_agrid_lonlat(self)-> tuple[npt.NDArray, npt.NDArray]:
-        D2R = np.pi/180
-        a_lon = None
-        a_lat = None
-        if self.x is not None and self.y is not None:
-            nx = (self.x.shape[1]-1)//2
-            ny = (self.x.shape[0]-1)//2
-            x_flat = self.x.flatten()
-            y_flat = self.y.flatten()
-
-            a_lon = np.zeros(shape=nx)
-            a_lat = np.zeros(shape=ny)
-
-            for i in range(nx):
-                a_lon[i] = x_flat[2*nx+1+2*i+1]*D2R
-            for j in range(ny):
-                a_lat[i] = y_flat[(2*j+1)*(2*nx+1)+1]*D2R
-
-        return np.ascontiguousarray(a_lon), np.ascontiguousarray(a_lat)
+
+        if self.x is None or self.y is None:
+            return None, None
+
+        return _agrid_lonlat(self.x, self.y)
 
 #TODO: I/O method for passing to the host
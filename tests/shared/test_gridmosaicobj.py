@@ -0,0 +1,75 @@
+import numpy as np
+import xarray as xr
+import fmsgridtools
+
+
+nx = 4
+ny = 3
+ntiles = 3
+
+
+def write_gridfiles(tmp_path) -> list:
+
+    gridfiles = []
+    for itile in range(ntiles):
+        x, y = np.meshgrid(np.arange(nx+1, dtype=np.float64) + 10*itile,
+                           np.arange(ny+1, dtype=np.float64))
+        area = np.full(shape=(ny,nx), fill_value=itile, dtype=np.float64)
+        gridfile = tmp_path / f"grid.tile{itile+1}.nc"
+        xr.Dataset(
+            data_vars=dict(tile=xr.DataArray([f"tile{itile+1}".encode()]),
+                           arcx=xr.DataArray([b"small_circle"]),
+                           x=xr.DataArray(x, dims=["nyp", "nxp"]),
+                           y=xr.DataArray(y, dims=["nyp", "nxp"]),
+                           area=xr.DataArray(area, dims=["ny", "nx"]))
+        ).to_netcdf(gridfile)
+        gridfiles.append(gridfile)
+
+    return gridfiles
+
+def test_gridmosaicobj_read(tmp_path):
+
+    gridfiles = write_gridfiles(tmp_path)
+    mosaic_grid = fmsgridtools.GridMosaicObj(gridfiles=gridfiles).read()
+
+    assert mosaic_grid.ntiles == ntiles
+    assert mosaic_grid.tiles == [f"tile{itile+1}" for itile in range(ntiles)]
+    assert mosaic_grid.x.shape == (ntiles, ny+1, nx+1)
+    assert mosaic_grid.area.shape == (ntiles, ny, nx)
+    assert mosaic_grid.dx is None
+
+    for itile in range(ntiles):
+        grid = fmsgridtools.GridObj(gridfile=gridfiles[itile]).read()
+        np.testing.assert_array_equal(mosaic_grid.x[itile], grid.x)
+        np.testing.assert_array_equal(mosaic_grid.area[itile], grid.area)
+
+def test_gridmosaicobj_get_tile(tmp_path):
+
+    gridfiles = write_gridfiles(tmp_path)
+    mosaic_grid = fmsgridtools.GridMosaicObj(gridfiles=gridfiles).read()
+
+    grid = mosaic_grid.get_tile(1)
+
+    assert grid.tile == "tile2"
+    assert grid.arcx == "small_circle"
+    assert grid.nx == nx
+    assert grid.nyp == ny + 1
+    assert np.shares_memory(grid.x, mosaic_grid.x)
+    np.testing.assert_array_equal(grid.x, mosaic_grid.x[1])
+
+def test_gridmosaicobj_write(tmp_path):
+
+    gridfiles = write_gridfiles(tmp_path)
+    mosaic_grid = fmsgridtools.GridMosaicObj(gridfiles=gridfiles).read()
+
+    outfiles = [tmp_path / f"out.tile{itile+1}.nc" for itile in range(ntiles)]
+    mosaic_grid.write(outfiles)
+
+    mosaic_grid_out = fmsgridtools.GridMosaicObj(gridfiles=outfiles).read()
+
+    assert mosaic_grid_out.tiles == mosaic_grid.tiles
+    assert mosaic_grid_out.arcx == ["small_circle"] * ntiles
+    assert mosaic_grid_out.dx is None
+    np.testing.assert_array_equal(mosaic_grid_out.x, mosaic_grid.x)
+    np.testing.assert_array_equal(mosaic_grid_out.y, mosaic_grid.y)
+    np.testing.assert_array_equal(mosaic_grid_out.area, mosaic_grid.area)
@@ -1,8 +1,11 @@
 import os
 
+import h5py
+import netCDF4
 import numpy as np
+import pytest
 import xarray as xr
-from gridtools import GridObj
+from fmsgridtools import GridObj
 
 
 """
@@ -110,10 +113,14 @@ def test_empty_grid_obj():
 
 def test_gridobj_from_dataset():
 
-    from_dataset_grid_obj = GridObj(grid_data=out_grid_dataset)
+    from_dataset_grid_obj = GridObj(dataset=out_grid_dataset)
     assert isinstance(from_dataset_grid_obj, GridObj)
-    assert from_dataset_grid_obj.grid_data is not None
-    assert from_dataset_grid_obj.grid_file is None
+    assert from_dataset_grid_obj.dataset is not None
+    assert from_dataset_grid_obj.gridfile is None
+    assert from_dataset_grid_obj.nx == nx
+    assert from_dataset_grid_obj.ny == ny
+    assert from_dataset_grid_obj.nxp == nxp
+    assert from_dataset_grid_obj.nyp == nyp
 
     np.testing.assert_array_equal(from_dataset_grid_obj.x, out_grid_dataset.x.values)
     np.testing.assert_array_equal(from_dataset_grid_obj.y, out_grid_dataset.y.values)
@@ -125,11 +132,11 @@ def test_gridobj_from_dataset():
 
 def test_write_out_grid_griddata(tmp_path):
 
-    from_dataset_grid_obj = GridObj(grid_data=out_grid_dataset)
+    from_dataset_grid_obj = GridObj(dataset=out_grid_dataset)
 
     file_path = tmp_path / "test_grid.nc"
 
-    from_dataset_grid_obj.write_out_grid(filepath=file_path)
+    from_dataset_grid_obj.write(filepath=file_path)
 
     assert file_path.exists()
 
@@ -139,15 +146,15 @@ def test_write_out_grid_griddata(tmp_path):
 
 def test_gridobj_from_gridfile_init(tmp_path):
 
-    from_dataset_grid_obj = GridObj(grid_data=out_grid_dataset)
+    from_dataset_grid_obj = GridObj(dataset=out_grid_dataset)
 
     file_path = tmp_path / "test_grid.nc"
 
-    from_dataset_grid_obj.write_out_grid(filepath=file_path)
+    from_dataset_grid_obj.write(filepath=file_path)
 
-    from_file_init_grid_obj = GridObj(grid_file=file_path)
+    from_file_init_grid_obj = GridObj(gridfile=file_path).read()
     assert isinstance(from_file_init_grid_obj, GridObj)
-    assert from_file_init_grid_obj.grid_file is not None
+    assert from_file_init_grid_obj.gridfile is not None
 
     # print(from_file_init_grid_obj.x)
 
@@ -165,13 +172,13 @@ def test_gridobj_from_gridfile_init(tmp_path):
 
 def test_gridobj_from_file(tmp_path):
 
-    from_dataset_grid_obj = GridObj(grid_data=out_grid_dataset)
+    from_dataset_grid_obj = GridObj(dataset=out_grid_dataset)
 
     file_path = tmp_path / "test_grid.nc"
 
-    from_dataset_grid_obj.write_out_grid(filepath=file_path)
+    from_dataset_grid_obj.write(filepath=file_path)
 
-    from_file_grid_obj = GridObj.from_file(filepath=file_path)
+    from_file_grid_obj = GridObj(gridfile=file_path).read()
 
     assert isinstance(from_file_grid_obj, GridObj)
 
@@ -186,3 +193,295 @@ def test_gridobj_from_file(tmp_path):
     np.testing.assert_array_equal(from_file_grid_obj.area, out_grid_dataset.area.values)
     np.testing.assert_array_equal(from_file_grid_obj.angle_dx, out_grid_dataset.angle_dx.values)
     np.testing.assert_array_equal(from_file_grid_obj.angle_dy, out_grid_dataset.angle_dy)
+
+def test_gridobj_read_toradians():
+
+    grid_obj = GridObj(dataset=out_grid_dataset)
+
+    # converting again starts from the dataset values
+    for _ in range(2):
+        grid_obj.read(toradians=True)
+        np.testing.assert_allclose(grid_obj.x, np.radians(out_grid_dataset.x.values))
+        np.testing.assert_allclose(grid_obj.y, np.radians(out_grid_dataset.y.values))
+
+def test_gridobj_lazy_read(tmp_path):
+
+    file_path = tmp_path / "test_grid.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+
+    grid_obj = GridObj(gridfile=file_path).read()
+
+    # only the sizes are set by read, variables are read on first access
+    assert grid_obj.nx == nx
+    assert grid_obj.ny == ny
+    for name in ("x", "y", "dx", "dy", "area", "angle_dx", "angle_dy", "tile"):
+        assert getattr(grid_obj, f"_{name}") is None
+
+    assert grid_obj.tile == "tile1"
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+    assert grid_obj._x is not None
+    assert grid_obj._area is None
+
+def test_get_agrid_lonlat():
+
+    # supergrid with fewer rows than columns, nx=3 and ny=2 A-grid cells
+    a_nx = 3
+    a_ny = 2
+    supergrid_x, supergrid_y = np.meshgrid(np.arange(2*a_nx+1, dtype=np.float64),
+                                           np.arange(2*a_ny+1, dtype=np.float64) + 10.0)
+
+    grid_obj = GridObj()
+    grid_obj.x = supergrid_x
+    grid_obj.y = supergrid_y
+
+    a_lon, a_lat = grid_obj.get_agrid_lonlat()
+
+    np.testing.assert_allclose(a_lon, np.radians([1.0, 3.0, 5.0]))
+    np.testing.assert_allclose(a_lat, np.radians([11.0, 13.0]))
+
+def test_get_agrid_lonlat_no_xy():
+
+    assert GridObj().get_agrid_lonlat() == (None, None)
+
+def test_xy_packed():
+
+    grid_obj = GridObj(dataset=out_grid_dataset)
+
+    packed = grid_obj.xy_packed(simd_width=8)
+
+    assert packed.shape == (nyp, 8, 2)
+    assert packed.flags.c_contiguous
+    assert packed.ctypes.data % 64 == 0
+    np.testing.assert_array_equal(packed[:, :nxp, 0], out_grid_dataset.x.values)
+    np.testing.assert_array_equal(packed[:, :nxp, 1], out_grid_dataset.y.values)
+    assert not packed[:, nxp:, :].any()
+
+    assert GridObj().xy_packed() is None
+
+def test_gridobj_shared_dataset(tmp_path):
+
+    file_path = tmp_path / "test_grid.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+
+    grid_obj1 = GridObj(gridfile=file_path).read()
+    grid_obj2 = GridObj(gridfile=file_path).read()
+
+    assert grid_obj1.dataset is grid_obj2.dataset
+
+    # arrays read from the shared dataset cannot be modified in place
+    with pytest.raises(ValueError):
+        grid_obj1.x *= 0
+    grid_obj1.x = grid_obj1.x.copy()
+    grid_obj1.x *= 0
+    np.testing.assert_array_equal(grid_obj2.x, out_grid_dataset.x.values)
+
+    # rewriting the file changes its mtime, so it is opened again
+    old_dataset = grid_obj1.dataset
+    old_dataset.close()
+    GridObj.from_arrays(x=np.zeros(shape=(nyp,nxp))).write(filepath=file_path)
+
+    grid_obj3 = GridObj(gridfile=file_path).read()
+
+    assert grid_obj3.dataset is not old_dataset
+    np.testing.assert_array_equal(grid_obj3.x, np.zeros(shape=(nyp,nxp)))
+
+def test_write_mosaic(tmp_path):
+
+    scaled_dataset = out_grid_dataset.copy(deep=False)
+    scaled_dataset["area"] = scaled_dataset["area"].copy()
+    scaled_dataset["area"].encoding = dict(dtype="int16", scale_factor=0.5, _FillValue=-999)
+
+    grid_objs = [GridObj(dataset=out_grid_dataset),
+                 GridObj(),
+                 GridObj(dataset=scaled_dataset)]
+    file_paths = [tmp_path / f"test_grid.tile{i+1}.nc" for i in range(3)]
+
+    GridObj.write_mosaic(grid_objs, file_paths)
+
+    # grids without variables are skipped
+    assert file_paths[0].exists()
+    assert not file_paths[1].exists()
+    assert file_paths[2].exists()
+
+    for file_path in (file_paths[0], file_paths[2]):
+        grid_obj = GridObj(gridfile=file_path).read()
+        assert grid_obj.tile == "tile1"
+        np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+        np.testing.assert_array_equal(grid_obj.area, out_grid_dataset.area.values)
+
+    # the source encoding is kept alongside the compression settings
+    area_encoding = GridObj(gridfile=file_paths[2]).read().dataset.area.encoding
+    assert area_encoding["dtype"] == np.int16
+    assert area_encoding["scale_factor"] == 0.5
+    assert area_encoding["zlib"]
+
+    with pytest.raises(ValueError):
+        GridObj.write_mosaic(grid_objs, file_paths[:2])
+
+def test_read_header(tmp_path):
+
+    file_path = tmp_path / "test_grid.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+
+    grid_obj = GridObj(gridfile=file_path).read_header()
+
+    assert grid_obj.nx == nx
+    assert grid_obj.ny == ny
+    assert grid_obj.nxp == nxp
+    assert grid_obj.nyp == nyp
+    assert grid_obj.dataset is None
+
+def test_gridobj_dtype(tmp_path):
+
+    file_path = tmp_path / "test_grid.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+
+    grid_obj = GridObj(gridfile=file_path).read()
+    assert grid_obj.x.dtype == np.float64
+
+    grid_obj = GridObj(gridfile=file_path, dtype=np.float32).read()
+    assert grid_obj.x.dtype == np.float32
+    assert grid_obj.dy.dtype == np.float32
+    assert grid_obj.area.dtype == np.float64
+    assert grid_obj.angle_dx.dtype == np.float64
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values.astype(np.float32))
+
+def test_gridobj_mmap(tmp_path, monkeypatch):
+
+    # contiguous, uncompressed netCDF4 variables are memory-mapped
+    file_path = tmp_path / "test_grid_contiguous.nc"
+    out_grid_dataset.to_netcdf(file_path, engine="h5netcdf")
+
+    h5py_file = h5py.File
+    h5py_opens = []
+    def counting_h5py_file(*args, **kwargs):
+        h5py_opens.append(args)
+        return h5py_file(*args, **kwargs)
+    monkeypatch.setattr(h5py, "File", counting_h5py_file)
+
+    grid_obj = GridObj(gridfile=file_path, mmap=True).read()
+
+    assert isinstance(grid_obj.x, np.memmap)
+    nopens = len(h5py_opens)
+    assert isinstance(grid_obj.area, np.memmap)
+    assert isinstance(grid_obj.angle_dy, np.memmap)
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+    np.testing.assert_array_equal(grid_obj.area, out_grid_dataset.area.values)
+    # the gridfile is only opened with h5py once per GridObj
+    assert len(h5py_opens) == nopens
+
+def test_gridobj_mmap_fallback(tmp_path):
+
+    # netCDF3 files are not HDF5 based
+    file_path = tmp_path / "test_grid_netcdf3.nc"
+    out_grid_dataset[["x", "y"]].to_netcdf(file_path, format="NETCDF3_64BIT")
+    grid_obj = GridObj(gridfile=file_path, mmap=True).read()
+    assert not isinstance(grid_obj.x, np.memmap)
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+
+    # variables that need CF decoding are read through xarray
+    file_path = tmp_path / "test_grid_scaled.nc"
+    scaled_dataset = out_grid_dataset.copy(deep=False)
+    scaled_dataset["x"] = scaled_dataset["x"].copy()
+    scaled_dataset["x"].encoding = dict(dtype="float32", scale_factor=2.0)
+    scaled_dataset.to_netcdf(file_path, engine="h5netcdf")
+    grid_obj = GridObj(gridfile=file_path, mmap=True).read()
+    assert not isinstance(grid_obj.x, np.memmap)
+    assert isinstance(grid_obj.y, np.memmap)
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+
+    # GridObj.write compresses the 2D fields
+    file_path = tmp_path / "test_grid_compressed.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+    grid_obj = GridObj(gridfile=file_path, mmap=True).read()
+    assert not isinstance(grid_obj.x, np.memmap)
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+
+def test_gridobj_from_arrays():
+
+    grid_obj = GridObj.from_arrays(x=out_grid_dataset.x.values,
+                                   area=out_grid_dataset.area.values,
+                                   tile="tile1")
+
+    assert grid_obj.dataset is None
+    assert grid_obj.tile == "tile1"
+    assert grid_obj.y is None
+    assert (grid_obj.nx, grid_obj.ny, grid_obj.nxp, grid_obj.nyp) == (nx, ny, nxp, nyp)
+    np.testing.assert_array_equal(grid_obj.x, out_grid_dataset.x.values)
+
+def test_gridobj_from_arrays_area_only():
+
+    grid_obj = GridObj.from_arrays(area=np.ones(shape=(ny,nx)))
+
+    assert grid_obj.nx == nx
+    assert grid_obj.ny == ny
+    assert grid_obj.nxp == nxp
+    assert grid_obj.nyp == nyp
+
+def test_gridobj_from_arrays_shape_mismatch():
+
+    with pytest.raises(ValueError, match="area"):
+        GridObj.from_arrays(x=np.zeros(shape=(5,5)), area=np.zeros(shape=(2,2)))
+
+    with pytest.raises(ValueError, match="dy"):
+        GridObj.from_arrays(x=np.zeros(shape=(nyp,nxp)), dy=np.zeros(shape=(ny,nx)))
+
+    with pytest.raises(ValueError, match="x"):
+        GridObj.from_arrays(x=np.zeros(nxp))
+
+    # the arrays can only be passed by keyword
+    with pytest.raises(TypeError):
+        GridObj.from_arrays(np.zeros(shape=(nyp,nxp)))
+
+def test_write_from_arrays(tmp_path):
+
+    grid_obj = GridObj.from_arrays(x=out_grid_dataset.x.values,
+                                   y=out_grid_dataset.y.values,
+                                   area=out_grid_dataset.area.values,
+                                   tile="tile1",
+                                   arcx="small_circle")
+
+    file_path = tmp_path / "test_grid.nc"
+    grid_obj.write(filepath=file_path)
+
+    read_grid_obj = GridObj(gridfile=file_path).read()
+    assert read_grid_obj.tile == "tile1"
+    assert read_grid_obj.arcx == "small_circle"
+    np.testing.assert_array_equal(read_grid_obj.x, out_grid_dataset.x.values)
+    np.testing.assert_array_equal(read_grid_obj.area, out_grid_dataset.area.values)
+
+    # same layout as a grid written through xarray
+    xarray_file_path = tmp_path / "test_grid_xarray.nc"
+    GridObj.write_mosaic([grid_obj], [xarray_file_path])
+    with netCDF4.Dataset(file_path) as ncfile, netCDF4.Dataset(xarray_file_path) as xr_ncfile:
+        assert set(ncfile.dimensions) == set(xr_ncfile.dimensions)
+        for name in ("tile", "arcx", "x", "area"):
+            assert ncfile[name].dimensions == xr_ncfile[name].dimensions
+            assert ncfile[name].dtype == xr_ncfile[name].dtype
+        assert ncfile["x"].filters()["zlib"]
+        assert ncfile["x"].filters()["complevel"] == 1
+        assert ncfile["x"].chunking() == [nyp, nxp]
+
+def test_write_header_only(tmp_path):
+
+    file_path = tmp_path / "test_grid.nc"
+    GridObj(dataset=out_grid_dataset).write(filepath=file_path)
+
+    header_file_path = tmp_path / "test_grid_header.nc"
+    GridObj(gridfile=file_path).read_header().write(filepath=header_file_path)
+
+    assert not header_file_path.exists()
+
+def test_write_without_sizes(tmp_path):
+
+    # sizes are taken from the arrays when they were not set
+    grid_obj = GridObj()
+    grid_obj.x = out_grid_dataset.x.values
+    assert grid_obj.nxp is None
+
+    file_path = tmp_path / "test_grid.nc"
+    grid_obj.write(filepath=file_path)
+
+    with netCDF4.Dataset(file_path) as ncfile:
+        assert ncfile["x"].chunking() == [nyp, nxp]
+    np.testing.assert_array_equal(GridObj(gridfile=file_path).read().x, out_grid_dataset.x.values)